@@ -13,16 +13,23 @@ from langchain.agents import initialize_agent, AgentType
 import matplotlib.pyplot as plt
 import seaborn as sns
 import logging
+import threading
 from functools import lru_cache
+from intent_router import IntentRouter
+from pricing_engine import PricingEngine, PricingDataError, grouped_correlation, quantity_column
 
 load_dotenv()
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Reply the LLM gives when a routed tool's output cannot answer the question
+NEEDS_AGENT = "NEEDS_AGENT"
+
 class RetailDataAnalyzer:
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, llm=None, router=None):
         self.df = self._load_data(csv_path)
-        self.llm = ChatOpenAI(temperature=0, model="gpt-3.5-turbo")
+        self.pricing_engine = PricingEngine(self.df)
+        self.llm = llm or ChatOpenAI(temperature=0, model="gpt-3.5-turbo")
         self.pandas_agent = create_pandas_dataframe_agent(
             self.llm, self.df, verbose=True, allow_dangerous_code=True
         )
@@ -60,6 +67,11 @@ Remember to support your insights with specific data points and always tie your
 """
         self.tools = self._create_tools()
         self.agent = self._setup_agent()
+        # The agent's conversation memory is not safe to share between worker threads
+        self._agent_lock = threading.Lock()
+        self.router = router or IntentRouter()
+        # Cache per instance so an evicted analyzer (and its DataFrame) can be freed
+        self.analyze = lru_cache(maxsize=None)(self._analyze)
 
     def _load_data(self, csv_path):
         logging.debug(f"Attempting to load data from {csv_path}")
@@ -128,6 +140,11 @@ Remember to support your insights with specific data points and always tie your
                 name="Promotion Effectiveness Analysis",
                 func=self.promotion_effectiveness_analysis,
                 description="Analyze the effectiveness of different promotional campaigns."
+            ),
+            Tool(
+                name="Optimal Pricing Analysis",
+                func=self.optimal_pricing_analysis,
+                description="Estimate price elasticity per product and the revenue- and profit-optimal price points."
             )
         ]
 
@@ -144,9 +161,40 @@ Remember to support your insights with specific data points and always tie your
             }
         )
 
-    @lru_cache(maxsize=None)
-    def analyze(self, question):
-        return self.agent.run(question)
+    def _analyze(self, question):
+        intent = self.router.route(question)
+        if intent is None:
+            return self._run_agent(question)
+        return self._answer_with_tool(intent, question)
+
+    def _run_agent(self, question):
+        with self._agent_lock:
+            return self.agent.run(question)
+
+    def memory_footprint(self):
+        return int(self.df.memory_usage(deep=True).sum())
+
+    def _answer_with_tool(self, intent, question):
+        # Recognized questions skip the agent loop: run the tool directly and
+        # make a single LLM call to turn its output into insights.
+        tool = getattr(self, intent.tool)
+        result = tool() if intent.analysis_type is None else tool(intent.analysis_type)
+        if isinstance(result, str):
+            logging.warning(f"Tool '{intent.tool}' failed, falling back to agent: {result}")
+            return self._run_agent(question)
+
+        prompt = (
+            f"{self.instruction}\n\nContext: {self.context}\n\n"
+            f"Question: {question}\n\n"
+            f"Output of the {intent.name.replace('_', ' ')} analysis:\n{result}\n\n"
+            "Answer the question using only the analysis output above. If it does not contain "
+            f"what the question asks for, reply with exactly {NEEDS_AGENT}."
+        )
+        answer = self.llm.invoke(prompt).content
+        if answer.strip() == NEEDS_AGENT:
+            logging.info(f"Output of '{intent.name}' does not answer the question, falling back to agent")
+            return self._run_agent(question)
+        return answer
 
     def customer_segmentation(self, analysis_type=None):
         try:
@@ -306,26 +354,40 @@ Remember to support your insights with specific data points and always tie your
 
     def promotion_effectiveness_analysis(self, analysis_type=None):
         try:
-            self.df['Discount_Rate'] = self.df['Discount_Applied'] / self.df['Total_Cost']
+            # Kept local: self.df is shared between concurrent requests
+            discount_rate = self.df['Discount_Applied'] / self.df['Total_Cost']
+            items_column = quantity_column(self.df)
             promotion_effectiveness = self.df.groupby('Store_Type').agg({
-                'Discount_Rate': 'mean',
                 'Total_Cost': 'sum',
-                'Quantity': 'sum'
+                items_column: 'sum'
             })
+            promotion_effectiveness.insert(0, 'Discount_Rate', discount_rate.groupby(self.df['Store_Type']).mean())
 
             if analysis_type == "Identify promotions that lead to the greatest increase in sales":
                 # Calculate the correlation between discount rate and total sales
-                correlation = self.df.groupby('Store_Type').apply(lambda x: x['Discount_Rate'].corr(x['Total_Cost']))
-                
-                # Identify store types where higher discounts lead to higher sales
-                effective_promotions = correlation[correlation > 0].sort_values(ascending=False)
-                
+                correlation = grouped_correlation(self.df['Store_Type'], discount_rate, self.df['Total_Cost'])
+
+                # Compare each promotion's average sale with sales made without one
+                promotion = self.df['Promotion'].fillna('None')
+                by_promotion = self.df.groupby(promotion).agg(
+                    Transactions=('Total_Cost', 'size'),
+                    Total_Sales=('Total_Cost', 'sum'),
+                    Average_Sale=('Total_Cost', 'mean'),
+                    Average_Items=(items_column, 'mean')
+                )
+                baseline = by_promotion.loc['None', 'Average_Sale'] if 'None' in by_promotion.index else self.df['Total_Cost'].mean()
+                by_promotion['Average_Sale_Uplift'] = by_promotion['Average_Sale'] / baseline - 1
+
+                uplift = by_promotion['Average_Sale_Uplift'].drop('None', errors='ignore')
+                effective_promotions = uplift[uplift > 0].sort_values(ascending=False)
+
                 results = {
-                    "promotion_effectiveness": promotion_effectiveness.to_dict(),
-                    "discount_sales_correlation": correlation.to_dict(),
-                    "most_effective_promotions": effective_promotions.to_dict()
+                    "sales_by_promotion": by_promotion.round(4).to_dict('index'),
+                    "most_effective_promotions": effective_promotions.round(4).to_dict(),
+                    "promotion_effectiveness_by_store_type": promotion_effectiveness.to_dict(),
+                    "discount_sales_correlation": correlation.to_dict()
                 }
-                
+
                 return results
             else:
                 return promotion_effectiveness.to_dict()
@@ -333,6 +395,34 @@ Remember to support your insights with specific data points and always tie your
             logging.error(f"Error in promotion effectiveness analysis: {str(e)}")
             return str(e)
 
+    def optimal_pricing_analysis(self, analysis_type=None):
+        try:
+            if analysis_type == "Price elasticity by product":
+                models = self.pricing_engine.fit().dropna(subset=['elasticity'])
+                return models.sort_values('total_quantity', ascending=False).head(20).round(3).to_dict('index')
+
+            optimal_prices = self.pricing_engine.optimal_prices()
+            if optimal_prices.empty:
+                # A string marks the tool as failed, so the router falls back before any LLM call
+                return "No product has enough independent price variation to estimate its elasticity"
+            best_sellers = optimal_prices.sort_values('total_quantity', ascending=False).head(10)
+            columns = ['elasticity', 'discount_effect', 'avg_price', 'min_price', 'max_price',
+                       'revenue_optimal_price', 'profit_optimal_price', 'unit_cost_estimate']
+            return {
+                "optimal_prices": best_sellers[columns].round(2).to_dict('index'),
+                "assumptions": [
+                    f"Unit cost is estimated as {self.pricing_engine.unit_cost_ratio:.0%} of the average price",
+                    "Optimal prices are searched within each product's observed price range",
+                    "Elasticity comes from a log-log model of quantity on unit price and Discount_Applied"
+                ]
+            }
+        except PricingDataError as e:
+            logging.warning(f"Optimal pricing analysis not possible: {str(e)}")
+            return str(e)
+        except Exception as e:
+            logging.error(f"Error in optimal pricing analysis: {str(e)}")
+            return str(e)
+
 
 class ProductAnalysis:
     def __init__(self, analyzer):
@@ -0,0 +1,104 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+
+from langchain_openai import ChatOpenAI
+
+from ai_functions import RetailDataAnalyzer
+from intent_router import IntentRouter
+
+
+DATASET_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class AnalyzerRegistry:
+    """Loads one RetailDataAnalyzer per dataset on demand and keeps them in LRU order.
+
+    All analyzers share a single LLM client (and therefore its HTTP connection
+    pool) and intent router. When the combined DataFrame memory of the loaded
+    analyzers exceeds max_memory_bytes, the least recently used ones are evicted.
+    A dataset id maps to <data_dir>/<dataset_id>.csv.
+    """
+
+    def __init__(self, data_dir, max_memory_bytes, default_dataset='retail_data', llm=None):
+        self.data_dir = data_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.default_dataset = default_dataset
+        self.llm = llm or ChatOpenAI(temperature=0, model="gpt-3.5-turbo")
+        self.router = IntentRouter()
+        self._analyzers = OrderedDict()
+        self._footprints = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def csv_path(self, dataset_id):
+        if not DATASET_ID_PATTERN.match(dataset_id):
+            raise ValueError(f"Invalid dataset id: {dataset_id}")
+        return os.path.join(self.data_dir, f"{dataset_id}.csv")
+
+    def get(self, dataset_id=None):
+        dataset_id = dataset_id or self.default_dataset
+        csv_path = self.csv_path(dataset_id)
+
+        with self._lock:
+            if dataset_id in self._analyzers:
+                self._analyzers.move_to_end(dataset_id)
+                return self._analyzers[dataset_id]
+            load_lock = self._loading.setdefault(dataset_id, threading.Lock())
+
+        # Load outside the registry lock so a slow CSV read does not block
+        # requests for datasets that are already loaded.
+        with load_lock:
+            try:
+                with self._lock:
+                    if dataset_id in self._analyzers:
+                        self._analyzers.move_to_end(dataset_id)
+                        return self._analyzers[dataset_id]
+
+                analyzer = RetailDataAnalyzer(csv_path, llm=self.llm, router=self.router)
+                footprint = analyzer.memory_footprint()
+                logging.info(f"Loaded dataset '{dataset_id}' ({footprint / 1024 ** 2:.1f} MB)")
+
+                with self._lock:
+                    self._analyzers[dataset_id] = analyzer
+                    self._footprints[dataset_id] = footprint
+                    self._evict(keep=dataset_id)
+            finally:
+                # Also on failure, so unknown dataset ids do not accumulate locks. A thread
+                # that waited on an earlier lock must not drop the one a newer load now holds.
+                with self._lock:
+                    if self._loading.get(dataset_id) is load_lock:
+                        del self._loading[dataset_id]
+            return analyzer
+
+    def _evict(self, keep):
+        while self.memory_usage() > self.max_memory_bytes and len(self._analyzers) > 1:
+            dataset_id = next(iter(self._analyzers))
+            if dataset_id == keep:
+                break
+            del self._analyzers[dataset_id]
+            footprint = self._footprints.pop(dataset_id)
+            logging.info(f"Evicted dataset '{dataset_id}' ({footprint / 1024 ** 2:.1f} MB)")
+
+    def reload(self, dataset_id=None):
+        dataset_id = dataset_id or self.default_dataset
+        self.unload(dataset_id)
+        return self.get(dataset_id)
+
+    def unload(self, dataset_id):
+        with self._lock:
+            self._analyzers.pop(dataset_id, None)
+            self._footprints.pop(dataset_id, None)
+
+    def memory_usage(self):
+        return sum(self._footprints.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_memory_bytes": self.max_memory_bytes,
+                "memory_usage_bytes": self.memory_usage(),
+                "datasets": {dataset_id: self._footprints[dataset_id] for dataset_id in self._analyzers},
+            }
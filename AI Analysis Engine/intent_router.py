@@ -0,0 +1,230 @@
+import re
+import logging
+from collections import namedtuple
+from functools import lru_cache
+
+from sklearn.feature_extraction.text import TfidfVectorizer, ENGLISH_STOP_WORDS
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+# tool: name of the RetailDataAnalyzer method to call
+# analysis_type: argument passed to that method (None calls it without one)
+# subjects: words naming what the tool is about; a question must contain one of them
+# keywords: groups of terms; an intent matches when every term of a group appears in the
+#   question as whole words. Intents are checked in order, so more specific ones come first.
+# examples: phrasings used to build the embedding index and the intent's vocabulary
+Intent = namedtuple('Intent', ['name', 'tool', 'analysis_type', 'subjects', 'keywords', 'examples'])
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that phrase a question without narrowing what it asks about; never "unknown"
+GENERIC_TERMS = {
+    'best', 'worst', 'most', 'least', 'highest', 'lowest', 'top', 'bottom', 'overall',
+    'compare', 'comparison', 'differ', 'difference', 'vary', 'change', 'show', 'list', 'tell',
+    'give', 'work', 'good', 'better', 'perform', 'performance', 'sale', 'sell', 'sold',
+    'revenue', 'analysis', 'analyze', 'analyse', 'insight', 'summary', 'summarize', 'exist',
+}
+
+
+DEFAULT_INTENTS = [
+    Intent(
+        name='customer_segmentation',
+        tool='customer_segmentation',
+        analysis_type=None,
+        subjects=('segment', 'segmentation', 'cluster'),
+        keywords=[('customer segmentation',), ('customer segments',), ('segment', 'customers'),
+                  ('customer clusters',)],
+        examples=[
+            "Can you perform customer segmentation and describe the characteristics of each segment?",
+            "Group our customers into segments by spending",
+            "What customer clusters do we have?",
+        ],
+    ),
+    Intent(
+        name='seasonal_anomalies',
+        tool='seasonal_trends',
+        analysis_type="Identify any interesting patterns or anomalies in the seasonal sales trends data.",
+        subjects=('season', 'seasonal'),
+        keywords=[('seasonal', 'anomalies'), ('seasonal', 'anomaly'), ('seasonal', 'unusual')],
+        examples=[
+            "Identify any interesting patterns or anomalies in the seasonal sales trends data.",
+            "Are there unusual seasonal sales patterns?",
+        ],
+    ),
+    Intent(
+        name='seasonal_trends',
+        tool='seasonal_trends',
+        analysis_type=None,
+        subjects=('season', 'seasonal'),
+        keywords=[('seasonal', 'trends'), ('season', 'trends')],
+        examples=[
+            "What are the seasonal trends in our sales data?",
+            "How do sales change across seasons?",
+            "Which season has the highest sales?",
+        ],
+    ),
+    Intent(
+        name='customer_lifetime_value',
+        tool='customer_lifetime_value',
+        analysis_type=None,
+        subjects=('lifetime', 'clv'),
+        keywords=[('lifetime value',), ('clv',)],
+        examples=[
+            "Who are our top 10 customers by lifetime value?",
+            "Which customers have spent the most overall?",
+        ],
+    ),
+    Intent(
+        name='price_elasticity',
+        tool='optimal_pricing_analysis',
+        analysis_type="Price elasticity by product",
+        subjects=('elasticity', 'elastic', 'sensitive', 'sensitivity'),
+        keywords=[('elasticity',), ('price', 'sensitive')],
+        examples=[
+            "What is the price elasticity of our products?",
+            "How sensitive is demand to price changes?",
+        ],
+    ),
+    Intent(
+        name='optimal_pricing',
+        tool='optimal_pricing_analysis',
+        analysis_type=None,
+        subjects=('price', 'pricing'),
+        keywords=[('optimal price',), ('price point',), ('price', 'maximize')],
+        examples=[
+            "What is the optimal price point for our best-selling products to maximize both sales volume and profit?",
+            "What prices maximize revenue and profit?",
+        ],
+    ),
+    Intent(
+        name='store_performance',
+        tool='store_performance_analysis',
+        analysis_type=None,
+        subjects=('store',),
+        keywords=[('store types', 'perform'), ('store performance',)],
+        examples=[
+            "How do our different store types perform?",
+            "Compare sales and unique customers across store types",
+        ],
+    ),
+    Intent(
+        name='promotion_effectiveness',
+        tool='promotion_effectiveness_analysis',
+        analysis_type="Identify promotions that lead to the greatest increase in sales",
+        subjects=('promotion', 'promotional'),
+        keywords=[('promotions', 'increase'), ('promotions', 'effective')],
+        examples=[
+            "What are the promotions that cause the greatest increase in sales?",
+            "Which promotions are most effective?",
+            "Which promotions boost sales the most?",
+        ],
+    ),
+]
+
+
+class IntentRouter:
+    """Maps a question to a deterministic analyzer tool without calling the LLM.
+
+    Only intents whose subject words appear in the question are candidates.
+    Keyword groups are checked first; otherwise the question is compared against
+    the TF-IDF embeddings of the candidates' examples, which are computed once at
+    construction, and the best one must reach threshold and beat the best other
+    intent by margin. Either way, a question using content words the intent has
+    never seen (a city, a product category, a customer group, ...) is asking for
+    something narrower than the tool computes and is left to the agent.
+    Returns None for questions that should go to the agent.
+
+    The defaults were tuned so that common rephrasings of each intent match
+    while every fixed analysis without a dedicated tool goes to the agent.
+    """
+
+    def __init__(self, intents=None, threshold=0.3, margin=0.1):
+        self.intents = list(intents if intents is not None else DEFAULT_INTENTS)
+        self.threshold = threshold
+        self.margin = margin
+        self._example_intents = []
+        self._keywords = {}
+        self._vocabulary = {}
+        self._subjects = {}
+        examples = []
+        for intent in self.intents:
+            self._keywords[intent.name] = [[self._tokenize(term) for term in group] for group in intent.keywords]
+            self._subjects[intent.name] = {self._singular(subject) for subject in intent.subjects}
+            vocabulary = set(self._subjects[intent.name])
+            for text in intent.examples + [term for group in intent.keywords for term in group]:
+                vocabulary.update(self._tokenize(text))
+            self._vocabulary[intent.name] = vocabulary
+            for example in intent.examples:
+                examples.append(example)
+                self._example_intents.append(intent)
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words='english', sublinear_tf=True)
+        self.example_embeddings = self.vectorizer.fit_transform(examples)
+
+    @staticmethod
+    def _singular(token):
+        # Crude singularisation so "product" and "products" are the same keyword
+        return token[:-1] if len(token) > 3 and token.endswith('s') and not token.endswith('ss') else token
+
+    def _tokenize(self, text):
+        return [self._singular(token) for token in TOKEN_PATTERN.findall(text.lower())]
+
+    @staticmethod
+    def _contains(tokens, term):
+        size = len(term)
+        return any(tokens[i:i + size] == term for i in range(len(tokens) - size + 1))
+
+    def _keyword_match(self, candidates, tokens):
+        for intent in candidates:
+            for group in self._keywords[intent.name]:
+                if all(self._contains(tokens, term) for term in group):
+                    return intent
+        return None
+
+    def _similarity_match(self, candidates, question):
+        embedding = self._embed(question)
+        if embedding.nnz == 0:
+            return None
+        names = {intent.name for intent in candidates}
+        scores = [score if other.name in names else -1.0
+                  for score, other in zip(cosine_similarity(embedding, self.example_embeddings)[0],
+                                          self._example_intents)]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        intent = self._example_intents[best]
+        runner_up = max((score for score, other in zip(scores, self._example_intents) if other.name != intent.name),
+                        default=0.0)
+        if scores[best] < self.threshold or scores[best] - runner_up < self.margin:
+            logging.debug(f"No intent matched (best score {scores[best]:.2f}, runner-up {runner_up:.2f})")
+            return None
+        logging.debug(f"Matched '{intent.name}' by similarity {scores[best]:.2f}")
+        return intent
+
+    def _unknown_terms(self, intent, question):
+        # Numbers ("top 10") only size the answer, so they never make a question unknown
+        return {token for token in TOKEN_PATTERN.findall(question)
+                if not token.isdigit() and token not in ENGLISH_STOP_WORDS
+                and self._singular(token) not in self._vocabulary[intent.name] | GENERIC_TERMS}
+
+    @lru_cache(maxsize=1024)
+    def _embed(self, question):
+        return self.vectorizer.transform([question])
+
+    def route(self, question):
+        if not question:
+            return None
+        question = ' '.join(question.lower().split())
+        tokens = self._tokenize(question)
+        candidates = [intent for intent in self.intents if self._subjects[intent.name] & set(tokens)]
+        if not candidates:
+            return None
+
+        intent = self._keyword_match(candidates, tokens) or self._similarity_match(candidates, question)
+        if intent is None:
+            return None
+
+        unknown = self._unknown_terms(intent, question)
+        if unknown:
+            logging.debug(f"Not routing to '{intent.name}', question mentions {sorted(unknown)}")
+            return None
+
+        logging.debug(f"Routed question to '{intent.name}'")
+        return intent
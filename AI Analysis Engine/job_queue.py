@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import socket
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+PENDING_STATUSES = (QUEUED, RUNNING)
+
+
+class JobStore:
+    """Persists analysis jobs, their progress and results in SQLite."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_key TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                owner TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._execute("CREATE INDEX IF NOT EXISTS idx_jobs_key_status ON jobs (job_key, status)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _execute(self, query, params=()):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(query, params)
+
+    def create_or_get_pending(self, job_key, params, owner):
+        """Returns (job_id, created); an identical queued or running job is reused.
+
+        The lookup and insert run in one BEGIN IMMEDIATE transaction, which takes the
+        database write lock up front, so server processes sharing the database
+        cannot both create the same job.
+        """
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE job_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (job_key, *PENDING_STATUSES)
+                ).fetchone()
+                if row:
+                    job_id, created = row[0], False
+                else:
+                    job_id, created = uuid.uuid4().hex, True
+                    conn.execute(
+                        "INSERT INTO jobs (id, job_key, params, status, progress, owner, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, 0, ?, ?, ?)",
+                        (job_id, job_key, json.dumps(params), QUEUED, owner, now, now)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return job_id, created
+
+    def update(self, job_id, status=None, progress=None, result=None, error=None):
+        fields = {'updated_at': time.time()}
+        if status is not None:
+            fields['status'] = status
+        if progress is not None:
+            fields['progress'] = progress
+        if result is not None:
+            fields['result'] = result
+        if error is not None:
+            fields['error'] = error
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        del job['job_key']
+        del job['owner']
+        return job
+
+    def fail_interrupted(self, is_alive):
+        """Marks pending jobs whose owning process is no longer running as failed.
+
+        is_alive(owner) decides; other server workers sharing the database keep their jobs.
+        """
+        with closing(self._connect()) as conn:
+            owners = [row[0] for row in conn.execute(
+                "SELECT DISTINCT owner FROM jobs WHERE status IN (?, ?)", PENDING_STATUSES
+            )]
+        for owner in owners:
+            if owner is None or not is_alive(owner):
+                self._execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?) AND owner IS ?",
+                    (FAILED, "Interrupted by server restart", time.time(), *PENDING_STATUSES, owner)
+                )
+
+
+class JobQueue:
+    """Runs analyses on a local thread pool and records their outcome in a JobStore.
+
+    runner(params, report_progress) must return the analysis result as a string;
+    report_progress accepts a float between 0 and 1.
+    """
+
+    def __init__(self, store, runner, max_workers=4):
+        self.store = store
+        self.runner = runner
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.store.fail_interrupted(self._owner_alive)
+
+    def _owner_alive(self, owner):
+        if owner == self.owner:
+            # A previous process with our pid; this one has not submitted anything yet
+            return False
+        host, _, pid = owner.rpartition(':')
+        if host != socket.gethostname():
+            # Cannot check processes on other hosts; leave their jobs alone
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            return True
+        return True
+
+    @staticmethod
+    def job_key(params):
+        return json.dumps(params, sort_keys=True)
+
+    def submit(self, params):
+        job_id, created = self.store.create_or_get_pending(self.job_key(params), params, self.owner)
+        if created:
+            self.executor.submit(self._run, job_id, params)
+        else:
+            logging.info(f"Reusing pending job {job_id} for {params}")
+        return job_id
+
+    def _run(self, job_id, params):
+        self.store.update(job_id, status=RUNNING, progress=0.05)
+        try:
+            result = self.runner(params, lambda progress: self.store.update(job_id, progress=progress))
+            self.store.update(job_id, status=COMPLETED, progress=1.0, result=str(result))
+        except Exception as e:
+            # Details stay in the log; job status is readable by any client
+            logging.error(f"Job {job_id} failed: {str(e)}")
+            self.store.update(job_id, status=FAILED, error="An error occurred during analysis")
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
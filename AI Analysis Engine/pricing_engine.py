@@ -0,0 +1,224 @@
+import ast
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def grouped_correlation(keys, x, y):
+    """Pearson correlation of x and y within each group of keys, computed without groupby.apply.
+
+    Missing values are ignored as in Series.corr. Infinite values (a discount rate
+    on a zero-cost sale) are ignored too, where Series.corr would return NaN for
+    the whole group.
+    """
+    x = pd.Series(x, dtype=float).replace([np.inf, -np.inf], np.nan)
+    y = pd.Series(y, dtype=float).replace([np.inf, -np.inf], np.nan)
+    valid = x.notna() & y.notna()
+    keys, x, y = pd.Series(keys)[valid], x[valid], y[valid]
+
+    dx = x - x.groupby(keys).transform('mean')
+    dy = y - y.groupby(keys).transform('mean')
+    sums = pd.DataFrame({'xy': dx * dy, 'xx': dx * dx, 'yy': dy * dy}).groupby(keys).sum()
+    denominator = np.sqrt(sums['xx'] * sums['yy'])
+    return (sums['xy'] / denominator.where(denominator > 0)).rename(None)
+
+
+def quantity_column(df):
+    """Per-row item count: Quantity in item-level data, Total_Items in the basket schema."""
+    return next((column for column in ('Quantity', 'Total_Items') if column in df.columns), None)
+
+
+def _grouped_sum(codes, values, n_groups):
+    return np.bincount(codes, weights=values, minlength=n_groups)
+
+
+def _as_list(value):
+    """Basket columns are stored as lists or their string form, e.g. "['Milk', 'Bread']"."""
+    if isinstance(value, str) and value.startswith('['):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+    return value
+
+
+class PricingDataError(ValueError):
+    """The data does not contain what is needed to estimate item-level price elasticity."""
+
+
+class PricingEngine:
+    """Per-product price elasticity and optimal price points.
+
+    For every product a log-log demand model
+
+        log(quantity) = intercept + elasticity * log(unit_price) + discount_effect * Discount_Applied
+
+    is fitted by least squares on item-level rows. The data must contain a per-item
+    price column; deriving price from a basket total divided by its quantity would
+    put quantity on both sides of the regression. Baskets (lists in the product
+    column, with the price and, if present, quantity columns holding matching lists)
+    are exploded to one row per item.
+
+    The normal equations of all products are built with grouped sums and solved
+    in one batched np.linalg.solve call. Products with too few rows, no price
+    variation, or prices that move in lockstep with Discount_Applied get no
+    elasticity. Optimal prices are searched on a grid within each product's
+    observed price range. The data has no cost column, so unit cost is assumed
+    to be unit_cost_ratio times the product's average price.
+
+    The DataFrame is never modified, so one engine can be shared between threads.
+    """
+
+    def __init__(self, df, product_column=None, price_column='Unit_Price', quantity_column=None,
+                 min_observations=5, unit_cost_ratio=0.7, grid_size=50):
+        self.df = df
+        self.product_column = product_column or ('Item_Name' if 'Item_Name' in df.columns else 'Product')
+        self.price_column = price_column
+        self.quantity_column = quantity_column or ('Quantity' if 'Quantity' in df.columns else None)
+        self.min_observations = min_observations
+        self.unit_cost_ratio = unit_cost_ratio
+        self.grid_size = grid_size
+        self._models = None
+        self._lock = threading.Lock()
+
+    def fit(self):
+        with self._lock:
+            if self._models is None:
+                self._models = self._fit()
+            return self._models
+
+    def _item_rows(self):
+        if self.price_column not in self.df.columns:
+            raise PricingDataError(
+                f"Price elasticity needs a per-item price column ('{self.price_column}'); "
+                f"the data only has basket totals"
+            )
+
+        discount = self.df['Discount_Applied']
+        if discount.dtype == object:
+            discount = discount.map({'True': 1, 'False': 0, True: 1, False: 0})
+        items = pd.DataFrame({
+            'product': self.df[self.product_column].map(_as_list),
+            'price': self.df[self.price_column].map(_as_list),
+            'discount': pd.to_numeric(discount, errors='coerce').astype(float),
+            'transaction': np.arange(len(self.df)),
+        })
+        if self.quantity_column:
+            items['quantity'] = self.df[self.quantity_column].map(_as_list)
+
+        is_basket = items['product'].map(lambda value: isinstance(value, list))
+        if is_basket.any():
+            list_columns = [column for column in ('product', 'price', 'quantity') if column in items]
+            if not items.loc[is_basket, 'price'].map(lambda value: isinstance(value, list)).all():
+                raise PricingDataError(
+                    f"'{self.product_column}' holds baskets but '{self.price_column}' is not a per-item list"
+                )
+            try:
+                items = items.explode(list_columns, ignore_index=True)
+            except ValueError:
+                raise PricingDataError(
+                    f"Basket lists in {', '.join(list_columns)} have different lengths"
+                )
+            if 'quantity' not in items:
+                # Without per-item quantities, each listing of an item in a basket is one unit
+                items = (items.assign(quantity=1)
+                         .groupby(['transaction', 'product', 'price', 'discount'], as_index=False)['quantity'].sum())
+        elif 'quantity' not in items:
+            items['quantity'] = 1
+
+        items['price'] = pd.to_numeric(items['price'], errors='coerce')
+        items['quantity'] = pd.to_numeric(items['quantity'], errors='coerce')
+        valid = (items['quantity'] > 0) & (items['price'] > 0) & items['discount'].notna() & items['product'].notna()
+        return items[valid]
+
+    def _fit(self):
+        items = self._item_rows()
+        codes, products = pd.factorize(items['product'])
+        n_products = len(products)
+        price = items['price'].to_numpy(dtype=float)
+        quantity = items['quantity'].to_numpy(dtype=float)
+        discount = items['discount'].to_numpy(dtype=float)
+        log_price, log_quantity = np.log(price), np.log(quantity)
+        logging.debug(f"Fitting price elasticity for {n_products} products on {len(items)} item rows")
+
+        observations = np.bincount(codes, minlength=n_products).astype(float)
+        safe_observations = np.maximum(observations, 1)
+
+        def centered(values):
+            return values - (_grouped_sum(codes, values, n_products) / safe_observations)[codes]
+
+        # Within-product (co)variances of the regressors, from centred values for accuracy
+        price_dev, discount_dev = centered(log_price), centered(discount)
+        price_variance = _grouped_sum(codes, price_dev ** 2, n_products) / safe_observations
+        discount_variance = _grouped_sum(codes, discount_dev ** 2, n_products) / safe_observations
+        covariance = _grouped_sum(codes, price_dev * discount_dev, n_products) / safe_observations
+
+        price_varies = price_variance > 1e-12
+        discount_varies = discount_variance > 1e-12
+        with np.errstate(divide='ignore', invalid='ignore'):
+            squared_correlation = covariance ** 2 / (price_variance * discount_variance)
+        collinear = price_varies & discount_varies & (squared_correlation > 1 - 1e-8)
+        identified = (observations >= self.min_observations) & price_varies & ~collinear
+
+        # Per-product normal equations X'X b = X'y with X = [1, log_price, discount]
+        design = [np.ones_like(log_price), log_price, discount]
+        xtx = np.empty((n_products, 3, 3))
+        xty = np.empty((n_products, 3))
+        for i in range(3):
+            xty[:, i] = _grouped_sum(codes, design[i] * log_quantity, n_products)
+            for j in range(i, 3):
+                xtx[:, i, j] = xtx[:, j, i] = _grouped_sum(codes, design[i] * design[j], n_products)
+
+        # Drop the discount term where it carries no separate information and replace
+        # unidentified systems by the identity so the batched solve never sees a singular matrix
+        drop_discount = ~discount_varies | collinear
+        xtx[drop_discount, 2, :] = 0
+        xtx[drop_discount, :, 2] = 0
+        xtx[drop_discount, 2, 2] = 1
+        xty[drop_discount, 2] = 0
+        xtx[~identified] = np.eye(3)
+        xty[~identified] = 0
+
+        coefficients = np.linalg.solve(xtx, xty[..., None])[..., 0]
+
+        prices = pd.DataFrame({'price': price, 'quantity': quantity, 'revenue': price * quantity}).groupby(codes)
+        price_stats = prices.agg(min_price=('price', 'min'), max_price=('price', 'max'),
+                                 avg_price=('price', 'mean'), total_quantity=('quantity', 'sum'),
+                                 total_revenue=('revenue', 'sum'))
+
+        models = pd.DataFrame({
+            'intercept': np.where(identified, coefficients[:, 0], np.nan),
+            'elasticity': np.where(identified, coefficients[:, 1], np.nan),
+            'discount_effect': np.where(identified & ~drop_discount, coefficients[:, 2], np.nan),
+            'observations': observations.astype(int),
+        }, index=pd.Index(products, name=self.product_column))
+        return models.join(price_stats.set_index(models.index))
+
+    def optimal_prices(self):
+        """Revenue- and profit-maximising price for each product with an identified elasticity."""
+        models = self.fit().dropna(subset=['elasticity'])
+        if models.empty:
+            return models
+
+        steps = np.linspace(0.0, 1.0, self.grid_size)
+        low = models['min_price'].to_numpy()[:, None]
+        high = models['max_price'].to_numpy()[:, None]
+        grid = low + (high - low) * steps
+        expected_quantity = np.exp(models['intercept'].to_numpy()[:, None]
+                                   + models['elasticity'].to_numpy()[:, None] * np.log(grid))
+        unit_cost = self.unit_cost_ratio * models['avg_price'].to_numpy()[:, None]
+        revenue = grid * expected_quantity
+        profit = (grid - unit_cost) * expected_quantity
+
+        rows = np.arange(len(models))
+        best_revenue = revenue.argmax(axis=1)
+        best_profit = profit.argmax(axis=1)
+        return models.assign(
+            revenue_optimal_price=grid[rows, best_revenue],
+            expected_revenue_per_transaction=revenue[rows, best_revenue],
+            profit_optimal_price=grid[rows, best_profit],
+            expected_profit_per_transaction=profit[rows, best_profit],
+            unit_cost_estimate=unit_cost[:, 0],
+        )
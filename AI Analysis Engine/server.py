@@ -4,8 +4,10 @@ from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, Any
 from ai_functions import *
+from analyzer_registry import AnalyzerRegistry
+from job_queue import JobStore, JobQueue
 
 
 # Set up logging
@@ -30,75 +32,177 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the RetailDataAnalyzer
+# Initialize the analyzer registry; each dataset_id maps to <DATA_DIR>/<dataset_id>.csv
 script_dir = os.path.dirname(os.path.abspath(__file__))
-csv_path = os.path.join(script_dir, 'retail_data.csv')
-retail_analyzer = RetailDataAnalyzer(csv_path)
+analyzer_registry = AnalyzerRegistry(
+    data_dir=os.getenv('DATA_DIR') or script_dir,
+    max_memory_bytes=int(os.getenv('ANALYZER_MEMORY_CAP_MB', '1024')) * 1024 ** 2,
+    default_dataset=os.getenv('DEFAULT_DATASET', 'retail_data'),
+)
 
 class AnalysisRequest(BaseModel):
     analysis_type: str
     custom_question: Optional[str] = None
+    dataset_id: Optional[str] = None
 
 class AnalysisResponse(BaseModel):
     result: str
 
+class JobResponse(BaseModel):
+    job_id: str
+
+class JobStatusResponse(BaseModel):
+    id: str
+    params: Dict[str, Any]
+    status: str
+    progress: float
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+ANALYSIS_CLASSES = {
+    'product': ProductAnalysis,
+    'customer': CustomerAnalysis,
+    'seasonal': SeasonalAnalysis,
+    'financial': FinancialAnalysis,
+    'transaction': TransactionAnalysis,
+    'anomaly': AnomalyDetection,
+    'gender_based_item': GenderBasedItemAnalysis,
+    'location_based_category': LocationbasedCategoryAnalysis,
+    'location_based_item': LocationBasedItemAnalysis,
+    'payment_method': PaymentMethodAnalysis,
+    'basket_size': BasketSizeAnalysis,
+    'profit_margin': ProfitMarginAnalysis,
+    'product_association': ProductAssociationAnalysis,
+    'customer_spending_behavior': CustomerSpendingBehaviorAnalysis,
+    'customer_retention': CustomerRetentionAnalysis,
+    'product_return': ProductReturnAnalysis,
+    'weather_impact': WeatherImpactAnalysis,
+    'loyalty_program': LoyaltyProgramAnalysis,
+    'underperforming_products': UnderperformingProductsAnalysis,
+    'marketing_channel_effectiveness': MarketingChannelEffectivenessAnalysis,
+    'repeat_purchase_interval': RepeatPurchaseIntervalAnalysis,
+    'urban_rural_sales': UrbanRuralSalesAnalysis,
+    'staff_training_impact': StaffTrainingImpactAnalysis,
+    'seasonal_promotion_impact': SeasonalPromotionImpactAnalysis,
+    'optimal_pricing': OptimalPricingAnalysis,
+    'promotion': PromotionAnalysis
+}
+
 def get_analysis_class(analysis_type: str):
-    analysis_classes = {
-        'product': ProductAnalysis,
-        'customer': CustomerAnalysis,
-        'seasonal': SeasonalAnalysis,
-        'financial': FinancialAnalysis,
-        'transaction': TransactionAnalysis,
-        'anomaly': AnomalyDetection,
-        'gender_based_item': GenderBasedItemAnalysis,
-        'location_based_category': LocationbasedCategoryAnalysis,
-        'location_based_item': LocationBasedItemAnalysis,
-        'payment_method': PaymentMethodAnalysis,
-        'basket_size': BasketSizeAnalysis,
-        'profit_margin': ProfitMarginAnalysis,
-        'product_association': ProductAssociationAnalysis,
-        'customer_spending_behavior': CustomerSpendingBehaviorAnalysis,
-        'customer_retention': CustomerRetentionAnalysis,
-        'product_return': ProductReturnAnalysis,
-        'weather_impact': WeatherImpactAnalysis,
-        'loyalty_program': LoyaltyProgramAnalysis,
-        'underperforming_products': UnderperformingProductsAnalysis,
-        'marketing_channel_effectiveness': MarketingChannelEffectivenessAnalysis,
-        'repeat_purchase_interval': RepeatPurchaseIntervalAnalysis,
-        'urban_rural_sales': UrbanRuralSalesAnalysis,
-        'staff_training_impact': StaffTrainingImpactAnalysis,
-        'seasonal_promotion_impact': SeasonalPromotionImpactAnalysis,
-        'optimal_pricing': OptimalPricingAnalysis,
-        'promotion': PromotionAnalysis
-    }
-    return analysis_classes.get(analysis_type)
+    return ANALYSIS_CLASSES.get(analysis_type)
+
+def validate_analysis_request(analysis_request: AnalysisRequest):
+    if analysis_request.analysis_type == 'custom':
+        if not analysis_request.custom_question:
+            logger.error("Custom question is required for custom analysis")
+            raise HTTPException(status_code=400, detail="Custom question is required for custom analysis")
+    elif not get_analysis_class(analysis_request.analysis_type):
+        logger.error(f"Invalid analysis type: {analysis_request.analysis_type}")
+        raise HTTPException(status_code=400, detail="Invalid analysis type")
+
+def get_analyzer(dataset_id: Optional[str]):
+    try:
+        return analyzer_registry.get(dataset_id)
+    except ValueError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        logger.error(f"Unknown dataset: {dataset_id}")
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+def run_analysis(retail_analyzer, analysis_type: str, custom_question: Optional[str] = None):
+    if analysis_type == 'custom':
+        return CustomQuestion(retail_analyzer).ask_question(custom_question)
+    return get_analysis_class(analysis_type)(retail_analyzer).analyze()
+
+def run_job(params, report_progress):
+    retail_analyzer = analyzer_registry.get(params['dataset_id'])
+    report_progress(0.3)
+    return run_analysis(retail_analyzer, params['analysis_type'], params.get('custom_question'))
+
+# Long-running analyses are executed by a local worker pool; jobs and results live in SQLite
+job_queue = JobQueue(
+    JobStore(os.getenv('JOBS_DB_PATH') or os.path.join(script_dir, 'jobs.db')),
+    run_job,
+    max_workers=int(os.getenv('JOB_WORKERS', '4')),
+)
+
+# Fixed analysis types computed in the background after a dataset is explicitly reloaded.
+# PREWARM_ANALYSIS_TYPES is a comma-separated list; set it empty to disable.
+prewarm_setting = os.getenv('PREWARM_ANALYSIS_TYPES', 'financial,anomaly,optimal_pricing')
+prewarm_analysis_types = [t.strip() for t in prewarm_setting.split(',') if t.strip() in ANALYSIS_CLASSES]
+
+
+def prewarm(dataset_id: str):
+    for analysis_type in prewarm_analysis_types:
+        job_queue.submit({'dataset_id': dataset_id, 'analysis_type': analysis_type, 'custom_question': None})
 
 
 @app.post("/analyze", response_model=AnalysisResponse)
-async def analyze(request: Request, analysis_request: AnalysisRequest):
-    logger.info(f"Received analysis request: {analysis_request.analysis_type}")
-    
+def analyze(request: Request, analysis_request: AnalysisRequest):
+    logger.info(f"Received analysis request: {analysis_request.analysis_type} (dataset: {analysis_request.dataset_id or 'default'})")
+
+    validate_analysis_request(analysis_request)
+    retail_analyzer = get_analyzer(analysis_request.dataset_id)
+
     try:
-        if analysis_request.analysis_type == 'custom':
-            if not analysis_request.custom_question:
-                logger.error("Custom question is required for custom analysis")
-                raise HTTPException(status_code=400, detail="Custom question is required for custom analysis")
-            analysis = CustomQuestion(retail_analyzer)
-            result = analysis.ask_question(analysis_request.custom_question)
-        else:
-            analysis_class = get_analysis_class(analysis_request.analysis_type)
-            if not analysis_class:
-                logger.error(f"Invalid analysis type: {analysis_request.analysis_type}")
-                raise HTTPException(status_code=400, detail="Invalid analysis type")
-            analysis = analysis_class(retail_analyzer)
-            result = analysis.analyze()
-        
+        result = run_analysis(retail_analyzer, analysis_request.analysis_type, analysis_request.custom_question)
         logger.info(f"Analysis completed successfully for: {analysis_request.analysis_type}")
         return AnalysisResponse(result=result)
     except Exception as e:
         logger.error(f"Error during analysis: {str(e)}")
         raise HTTPException(status_code=500, detail="An error occurred during analysis")
 
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+def create_job(analysis_request: AnalysisRequest):
+    logger.info(f"Received job request: {analysis_request.analysis_type} (dataset: {analysis_request.dataset_id or 'default'})")
+
+    validate_analysis_request(analysis_request)
+    dataset_id = analysis_request.dataset_id or analyzer_registry.default_dataset
+    try:
+        csv_path = analyzer_registry.csv_path(dataset_id)
+    except ValueError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.exists(csv_path):
+        logger.error(f"Unknown dataset: {dataset_id}")
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    job_id = job_queue.submit({
+        'dataset_id': dataset_id,
+        'analysis_type': analysis_request.analysis_type,
+        'custom_question': analysis_request.custom_question if analysis_request.analysis_type == 'custom' else None,
+    })
+    return JobResponse(job_id=job_id)
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job)
+
+@app.get("/datasets")
+async def datasets():
+    return analyzer_registry.stats()
+
+@app.post("/datasets/{dataset_id}/reload")
+def reload_dataset(dataset_id: str):
+    try:
+        analyzer_registry.reload(dataset_id)
+        prewarm(dataset_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return analyzer_registry.stats()
+
+@app.on_event("shutdown")
+def shutdown_job_queue():
+    job_queue.shutdown()
+
 if __name__ == "__main__":
     import uvicorn
     logger.info("Starting the Retail Analysis AI Server")
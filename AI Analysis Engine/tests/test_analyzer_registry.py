@@ -0,0 +1,35 @@
+import pytest
+
+from analyzer_registry import AnalyzerRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return AnalyzerRegistry(str(tmp_path), max_memory_bytes=1024 ** 2, llm=object())
+
+
+def test_rejects_dataset_ids_outside_data_dir(registry):
+    with pytest.raises(ValueError):
+        registry.get('../retail_data')
+
+
+def test_unknown_dataset_does_not_leak_load_locks(registry):
+    for dataset_id in ('missing_a', 'missing_b'):
+        with pytest.raises(FileNotFoundError):
+            registry.get(dataset_id)
+    assert registry._loading == {}
+    assert registry.stats()['datasets'] == {}
+
+
+def test_failed_load_keeps_a_newer_load_lock(registry, monkeypatch):
+    newer_lock = object()
+
+    def failing_load(csv_path, **kwargs):
+        # Another thread registered a fresh lock for the same dataset meanwhile
+        registry._loading['missing'] = newer_lock
+        raise FileNotFoundError(csv_path)
+
+    monkeypatch.setattr('analyzer_registry.RetailDataAnalyzer', failing_load)
+    with pytest.raises(FileNotFoundError):
+        registry.get('missing')
+    assert registry._loading == {'missing': newer_lock}
@@ -0,0 +1,76 @@
+import inspect
+
+import pytest
+
+import ai_functions
+from intent_router import IntentRouter
+
+
+# Fixed analyses answered by a built-in tool; every other *Analysis question must go to the agent
+EXPECTED_INTENTS = {
+    'CustomerAnalysis': 'customer_segmentation',
+    'SeasonalAnalysis': 'seasonal_trends',
+    'OptimalPricingAnalysis': 'optimal_pricing',
+    'PromotionAnalysis': 'promotion_effectiveness',
+}
+
+
+class QuestionRecorder:
+    def analyze(self, question):
+        return question
+
+
+def fixed_questions():
+    for name, cls in inspect.getmembers(ai_functions, inspect.isclass):
+        if cls.__module__ == 'ai_functions' and name != 'RetailDataAnalyzer' and hasattr(cls, 'analyze'):
+            yield name, cls(QuestionRecorder()).analyze()
+
+
+@pytest.fixture(scope='module')
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize('name, question', list(fixed_questions()))
+def test_fixed_analysis_questions(router, name, question):
+    intent = router.route(question)
+    assert (intent.name if intent else None) == EXPECTED_INTENTS.get(name)
+
+
+@pytest.mark.parametrize('question, expected', [
+    ("Who are our top 10 customers by lifetime value?", 'customer_lifetime_value'),
+    ("Identify any interesting patterns or anomalies in the seasonal sales trends data.", 'seasonal_anomalies'),
+    ("Which promotions are most effective?", 'promotion_effectiveness'),
+    ("What is the price elasticity of our products?", 'price_elasticity'),
+    # Rephrasings that are not among the examples
+    ("Who are our top 20 customers by lifetime value?", 'customer_lifetime_value'),
+    ("Which customers have the highest lifetime value?", 'customer_lifetime_value'),
+    ("What customer segments exist?", 'customer_segmentation'),
+    ("Were there any unusual seasonal patterns?", 'seasonal_anomalies'),
+    ("Show me the seasonal sales trends", 'seasonal_trends'),
+    ("How do sales vary by season?", 'seasonal_trends'),
+    ("Which season sells the most?", 'seasonal_trends'),
+    ("How price sensitive are our products?", 'price_elasticity'),
+    ("What price maximizes profit?", 'optimal_pricing'),
+    ("How do store types compare?", 'store_performance'),
+    ("Compare performance across store types", 'store_performance'),
+    ("Which promotions work best?", 'promotion_effectiveness'),
+])
+def test_routes_known_questions(router, question, expected):
+    assert router.route(question).name == expected
+
+
+@pytest.mark.parametrize('question', [
+    # Keywords are whole words: "laptop" does not contain "top"
+    "Which laptop products had the highest sales?",
+    # Filters the tools cannot apply are left to the agent
+    "What are the seasonal trends for Electronics in New York?",
+    "Can you perform customer segmentation for customers in Chicago?",
+    "How do store types compare on returns?",
+    # Product tools group by the raw basket string, so product questions go to the agent
+    "What are the top 10 products by total sales?",
+    "Which products sell best?",
+    "",
+])
+def test_leaves_other_questions_to_agent(router, question):
+    assert router.route(question) is None
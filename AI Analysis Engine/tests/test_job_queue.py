@@ -0,0 +1,71 @@
+import sqlite3
+import threading
+
+import pytest
+
+from job_queue import JobStore, JobQueue, QUEUED, FAILED, COMPLETED
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.db'))
+
+
+def test_identical_pending_jobs_are_deduplicated(store):
+    release = threading.Event()
+    queue = JobQueue(store, lambda params, report_progress: release.wait(5) and 'done', max_workers=1)
+    params = {'dataset_id': 'retail_data', 'analysis_type': 'financial', 'custom_question': None}
+
+    first = queue.submit(params)
+    assert queue.submit(dict(params)) == first
+    release.set()
+    queue.executor.shutdown(wait=True)
+
+    job = queue.get(first)
+    assert job['status'] == COMPLETED
+    assert job['result'] == 'done'
+    assert job['params'] == params
+
+
+def test_restart_only_fails_jobs_of_dead_owners(store):
+    live, _ = store.create_or_get_pending('a', {'n': 1}, 'host:live')
+    dead, _ = store.create_or_get_pending('b', {'n': 2}, 'host:dead')
+
+    store.fail_interrupted(lambda owner: owner == 'host:live')
+
+    assert store.get(live)['status'] == QUEUED
+    assert store.get(dead)['status'] == FAILED
+
+
+def test_pending_job_created_by_another_process_is_reused(store):
+    # Another server process holds the write lock while creating the same job
+    other = sqlite3.connect(store.db_path, timeout=1, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    results = []
+    thread = threading.Thread(target=lambda: results.append(store.create_or_get_pending('key', {'n': 1}, 'host:2')))
+    thread.start()
+    thread.join(0.2)
+    assert thread.is_alive()
+
+    other.execute(
+        "INSERT INTO jobs (id, job_key, params, status, progress, owner, created_at, updated_at) "
+        "VALUES ('other', 'key', '{}', ?, 0, 'host:1', 0, 0)", (QUEUED,)
+    )
+    other.execute("COMMIT")
+    other.close()
+    thread.join(5)
+
+    assert results == [('other', False)]
+
+
+def test_failed_job_stores_a_generic_error(store):
+    def runner(params, report_progress):
+        raise RuntimeError("secret connection string")
+
+    queue = JobQueue(store, runner, max_workers=1)
+    job_id = queue.submit({'analysis_type': 'financial'})
+    queue.executor.shutdown(wait=True)
+
+    job = queue.get(job_id)
+    assert job['status'] == FAILED
+    assert job['error'] == "An error occurred during analysis"
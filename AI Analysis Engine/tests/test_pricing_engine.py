@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pricing_engine import PricingEngine, PricingDataError, grouped_correlation
+
+
+def demand_rows(product, elasticity, discount_effect, n, rng, base=50.0):
+    price = rng.uniform(2.0, 10.0, n)
+    discount = rng.integers(0, 2, n)
+    log_quantity = np.log(base) + elasticity * np.log(price) + discount_effect * discount + rng.normal(0, 0.05, n)
+    return pd.DataFrame({
+        'Item_Name': product,
+        'Unit_Price': price,
+        'Quantity': np.exp(log_quantity),
+        'Discount_Applied': discount.astype(bool),
+    })
+
+
+def test_recovers_known_elasticities():
+    rng = np.random.default_rng(0)
+    df = pd.concat([demand_rows('Milk', -2.0, 0.3, 400, rng), demand_rows('Bread', -0.5, 0.0, 400, rng)])
+
+    models = PricingEngine(df).fit()
+
+    assert models.loc['Milk', 'elasticity'] == pytest.approx(-2.0, abs=0.05)
+    assert models.loc['Bread', 'elasticity'] == pytest.approx(-0.5, abs=0.05)
+    assert models.loc['Milk', 'discount_effect'] == pytest.approx(0.3, abs=0.05)
+
+
+def test_independent_quantity_and_price_give_no_elasticity_bias():
+    rng = np.random.default_rng(1)
+    n = 2000
+    df = pd.DataFrame({
+        'Item_Name': rng.choice(['a', 'b'], n),
+        'Unit_Price': rng.uniform(1.0, 20.0, n),
+        'Quantity': rng.integers(1, 10, n),
+        'Discount_Applied': rng.integers(0, 2, n).astype(bool),
+    })
+
+    elasticity = PricingEngine(df).fit()['elasticity']
+
+    assert elasticity.abs().max() < 0.1
+
+
+def test_unidentified_products_get_no_elasticity():
+    rng = np.random.default_rng(2)
+    discount = np.arange(40) % 2
+    df = pd.concat([
+        demand_rows('Identified', -1.0, 0.0, 200, rng),
+        # One price only
+        pd.DataFrame({'Item_Name': 'Fixed', 'Unit_Price': 4.0, 'Quantity': rng.integers(1, 5, 40),
+                      'Discount_Applied': discount.astype(bool)}),
+        # The price is fully determined by the discount flag
+        pd.DataFrame({'Item_Name': 'Collinear', 'Unit_Price': np.where(discount == 1, 8.0, 10.0),
+                      'Quantity': rng.integers(1, 5, 40), 'Discount_Applied': discount.astype(bool)}),
+        demand_rows('Rare', -1.0, 0.0, 3, rng),
+    ])
+
+    models = PricingEngine(df).fit()
+
+    assert models.loc['Identified', 'elasticity'] == pytest.approx(-1.0, abs=0.05)
+    assert models.loc[['Fixed', 'Collinear', 'Rare'], 'elasticity'].isna().all()
+    assert list(PricingEngine(df).optimal_prices().index) == ['Identified']
+
+
+def test_explodes_baskets_into_item_rows():
+    df = pd.DataFrame({
+        'Product': ["['Milk', 'Bread']", "['Milk', 'Milk']", "['Bread']"],
+        'Unit_Price': ["[2.0, 3.0]", "[1.5, 1.5]", "[3.5]"],
+        'Discount_Applied': [False, True, False],
+    })
+
+    models = PricingEngine(df, min_observations=1).fit()
+
+    assert models.loc['Milk', 'total_quantity'] == 3
+    assert models.loc['Milk', 'min_price'] == 1.5
+    assert models.loc['Bread', 'total_quantity'] == 2
+
+
+def test_requires_a_per_item_price():
+    baskets = pd.DataFrame({
+        'Product': ["['Milk', 'Bread']"],
+        'Total_Items': [2],
+        'Total_Cost': [5.0],
+        'Discount_Applied': [False],
+    })
+    with pytest.raises(PricingDataError):
+        PricingEngine(baskets).fit()
+
+    with pytest.raises(PricingDataError):
+        PricingEngine(baskets.assign(Unit_Price=2.5)).fit()
+
+
+def test_grouped_correlation_matches_groupby_apply():
+    rng = np.random.default_rng(3)
+    n = 500
+    df = pd.DataFrame({
+        'Store_Type': rng.choice(['Mall', 'Outlet', 'Kiosk'], n),
+        'Discount_Applied': rng.integers(0, 2, n).astype(float),
+        'Total_Cost': rng.uniform(1.0, 100.0, n),
+    })
+    df['Discount_Rate'] = df['Discount_Applied'] / df['Total_Cost']
+    df.loc[:5, 'Discount_Rate'] = np.nan
+
+    expected = df.groupby('Store_Type').apply(lambda x: x['Discount_Rate'].corr(x['Total_Cost']))
+    result = grouped_correlation(df['Store_Type'], df['Discount_Rate'], df['Total_Cost'])
+
+    pd.testing.assert_series_equal(result.sort_index(), expected.sort_index(), check_names=False)
+
+
+def test_grouped_correlation_ignores_infinite_rates():
+    keys = pd.Series(['a'] * 4 + ['b'] * 2)
+    x = pd.Series([1.0, 2.0, np.inf, 4.0, 1.0, 1.0])
+    y = pd.Series([1.0, 2.0, 3.0, 5.0, 2.0, 3.0])
+
+    result = grouped_correlation(keys, x, y)
+
+    assert result['a'] == pytest.approx(x[[0, 1, 3]].corr(y[[0, 1, 3]]))
+    # No variation in x: undefined, as with Series.corr
+    assert np.isnan(result['b'])